@@ -0,0 +1,125 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from prompt_toolkit.document import Document
+
+from todo_app.todo import TodoApp
+from todo_app.todo_completer import TodoCompleter
+
+SNAPSHOT = '''[
+  {"id": "aaaa1111000000000000000000000001", "description": "first"},
+  {"id": "bbbb2222000000000000000000000002", "description": "second"}
+]'''
+
+# Shares its short id with the first snapshot task
+SHARED_ID = 'aaaa1111ffffffffffffffffffffffff'
+
+
+class CompleterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        data_file = os.path.join(self.dir, 'tasks.json')
+        with open(data_file, 'w') as f:
+            f.write(SNAPSHOT)
+        self.app = TodoApp(data_file)
+        self.completer = TodoCompleter(self.app)
+        self.app.completer = self.completer
+
+    def tearDown(self):
+        if self.app._journal is not None:
+            self.app._journal.close()
+        shutil.rmtree(self.dir)
+
+    def complete(self, text):
+        completions = self.completer.get_completions(Document(text), None)
+        return [(c.text, c.display_meta_text) for c in completions]
+
+    def quietly(self, method, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return method(*args, **kwargs)
+
+    def add_shared(self):
+        with mock.patch('os.urandom', return_value=bytes.fromhex(SHARED_ID)):
+            self.quietly(self.app.add_task, 'third')
+        return self.app._by_id[SHARED_ID]
+
+    def test_commands_and_arguments(self):
+        self.assertEqual(self.complete('d'), [('del', ''), ('done', '')])
+        self.assertEqual(self.complete('list p'), [
+            ('pending', 'Filter'), ('priority:high', 'Filter'), ('priority:low', 'Filter'),
+            ('priority:medium', 'Filter'), ('priority:none', 'Filter')])
+        self.assertEqual(self.complete('list sort=d'), [
+            ('description', 'Sort Key'), ('due_date', 'Sort Key')])
+        self.assertEqual(self.complete('add x priority=h'), [('high', 'Priority')])
+        self.assertEqual(self.complete('add "x y" pr'), [('priority=', 'Keyword')])
+        self.assertEqual(self.complete('exit '), [])
+
+    def test_task_ids(self):
+        self.assertEqual(self.complete('done a'), [('aaaa1111', 'first')])
+        self.assertEqual(self.complete('edit b'), [('bbbb2222', 'second')])
+        self.assertEqual(self.complete('del c'), [])
+        self.assertEqual(self.complete('del a '), [])
+
+    def test_add_then_delete_shared_short_id(self):
+        shared = self.add_shared()
+        self.assertEqual(self.complete('done aaaa'), [('aaaa1111', 'Task ID')])
+
+        with mock.patch('builtins.input', return_value='y'):
+            self.quietly(self.app.delete_task, shared)
+        self.assertEqual(self.complete('done aaaa'), [('aaaa1111', 'first')])
+
+        with mock.patch('builtins.input', return_value='y'):
+            self.quietly(self.app.delete_task, 'aaaa1111000000000000000000000001')
+        self.assertEqual(self.complete('done aaaa'), [])
+        self.assertEqual(self.complete('done b'), [('bbbb2222', 'second')])
+
+    def test_narrowing_follows_task_changes(self):
+        # Typing further reuses the last id matches; a task change must not
+        self.assertEqual(self.complete('done a'), [('aaaa1111', 'first')])
+        self.add_shared()
+        self.assertEqual(self.complete('done aa'), [('aaaa1111', 'Task ID')])
+
+    def test_edit_shows_new_description(self):
+        self.assertEqual(self.complete('toggle b'), [('bbbb2222', 'second')])
+        self.quietly(self.app.edit_task, 'bbbb2222', new_description='renamed')
+        self.assertEqual(self.complete('toggle b'), [('bbbb2222', 'renamed')])
+
+    def test_cache_is_keyed_on_tasks_version(self):
+        self.assertEqual(self.complete('undone a'), [('aaaa1111', 'first')])
+        version = self.app.tasks_version
+        self.quietly(self.app.toggle_complete, 'aaaa1111')
+        self.assertGreater(self.app.tasks_version, version)
+        self.quietly(self.app.edit_task, 'aaaa1111', new_description='changed')
+        self.assertEqual(self.complete('undone a'), [('aaaa1111', 'changed')])
+
+    def complete_at(self, text, now):
+        class FakeDatetime(datetime.datetime):
+            @classmethod
+            def now(cls):
+                return now
+        clock = types.SimpleNamespace(monotonic=now.timestamp)
+        with mock.patch('todo_app.todo_completer.datetime', types.SimpleNamespace(datetime=FakeDatetime)), \
+                mock.patch('todo_app.todo_completer.time', clock):
+            return self.complete(text)
+
+    def test_due_suggestions_are_never_cached(self):
+        first = self.complete_at('add x due=', datetime.datetime(2024, 5, 20, 9, 0))
+        second = self.complete_at('add x due=', datetime.datetime(2024, 5, 21, 12, 0))
+        self.assertEqual(first, [
+            ('none', 'Remove due date'), ('"2024-05-20"', "Today's date"),
+            ('"2024-05-20 09:00AM"', 'Current datetime')])
+        self.assertEqual(second, [
+            ('none', 'Remove due date'), ('"2024-05-21"', "Today's date"),
+            ('"2024-05-21 12:00PM"', 'Current datetime')])
+        self.assertNotIn((self.app.tasks_version, 'add x due='), self.completer._completion_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
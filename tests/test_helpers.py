@@ -0,0 +1,50 @@
+import datetime
+import shlex
+import unittest
+
+from todo_app.helpers import get_datetime_from_iso, parse_datetime_flexible, split_args
+
+
+class ParseDatetimeFlexibleTest(unittest.TestCase):
+    def test_accepts_naive_formats(self):
+        expected = datetime.datetime(2020, 1, 1, 9, 0)
+        self.assertEqual(parse_datetime_flexible('2020-01-01T09:00'), expected)
+        self.assertEqual(parse_datetime_flexible('2020-01-01 09:00AM'), expected)
+        self.assertEqual(parse_datetime_flexible('2020-01-01'),
+                         datetime.datetime(2020, 1, 1))
+
+    def test_rejects_utc_offsets(self):
+        self.assertIsNone(parse_datetime_flexible('2020-01-01T09:00+05:00'))
+        self.assertIsNone(parse_datetime_flexible('2020-01-01T09:00+00:00'))
+
+
+class GetDatetimeFromIsoTest(unittest.TestCase):
+    def test_stored_offset_compares_with_naive(self):
+        dt = get_datetime_from_iso('2020-01-01T09:00+05:00')
+        self.assertIsNone(dt.tzinfo)
+        self.assertLess(dt, datetime.datetime.now())
+
+
+class SplitArgsTest(unittest.TestCase):
+    CASES = [
+        'add buy milk',
+        '  list  pending\tsort=due_date ',
+        'add "two words" priority=high',
+        "edit abc desc='new text' due=\"2024-05-20 09:00AM\"",
+        'add caf\u00e9\u00a0bar',
+        'add a\u2003b "c\u00a0d"',
+        'add a\x0bb\x1cc',
+    ]
+
+    def test_matches_shlex(self):
+        for case in self.CASES:
+            with self.subTest(case=case):
+                self.assertEqual(split_args(case), shlex.split(case))
+
+    def test_malformed_input_raises_like_shlex(self):
+        with self.assertRaises(ValueError):
+            split_args('add "unterminated')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from todo_app import todo
+from todo_app.todo import TodoApp
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.dir, 'tasks.json')
+        self.apps = []
+
+    def tearDown(self):
+        for app in self.apps:
+            if app._journal is not None:
+                app._journal.close()
+        shutil.rmtree(self.dir)
+
+    def open_app(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = TodoApp(self.data_file)
+        self.apps.append(app)
+        return app
+
+    def add(self, app, *descriptions):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for description in descriptions:
+                app.add_task(description)
+
+    def close_without_compacting(self, app):
+        # Like a killed session: the journal is left behind as written
+        app._journal.close()
+        app._journal = None
+
+    def descriptions(self, app):
+        return [t.description for t in app.tasks]
+
+    def test_replay_restores_journaled_tasks(self):
+        app = self.open_app()
+        self.add(app, 'one', 'two')
+        self.close_without_compacting(app)
+        self.assertFalse(os.path.exists(self.data_file))
+        self.assertEqual(self.descriptions(self.open_app()), ['one', 'two'])
+
+    def test_torn_record_is_cut_off_before_new_appends(self):
+        app = self.open_app()
+        self.add(app, 'one', 'two')
+        self.close_without_compacting(app)
+        with open(app.journal_file, 'ab') as f:
+            f.write(b'{"op": "add", "task": {"id": "ab')
+
+        app = self.open_app()
+        self.assertEqual(self.descriptions(app), ['one', 'two'])
+        self.add(app, 'three', 'four')
+        self.close_without_compacting(app)
+
+        self.assertEqual(self.descriptions(self.open_app()),
+                         ['one', 'two', 'three', 'four'])
+
+    def test_unterminated_last_record_is_kept(self):
+        app = self.open_app()
+        self.add(app, 'one', 'two')
+        self.close_without_compacting(app)
+        with open(app.journal_file, 'rb') as f:
+            buf = f.read()
+        with open(app.journal_file, 'wb') as f:
+            f.write(buf.rstrip(b'\n'))
+
+        app = self.open_app()
+        self.assertEqual(self.descriptions(app), ['one', 'two'])
+        self.add(app, 'three')
+        self.close_without_compacting(app)
+
+        self.assertEqual(self.descriptions(self.open_app()), ['one', 'two', 'three'])
+
+    def test_bad_tail_is_cut_off(self):
+        tails = [
+            b'{"op": "add", "task": {"id": "ab", "description": "caf\xc3',
+            b'[1, 2]\n',
+            b'{"op": "put", "task": null}\n',
+            b'{"op": "put", "task": {"description": "no id"}}\n',
+            b'{"op": "del"}\n',
+            b'{"id": "ab"}\n',
+        ]
+        # orjson is optional; the stdlib codec raises UnicodeDecodeError
+        # rather than JSONDecodeError for a split UTF-8 sequence
+        cases = [(loads, tail) for loads in (todo._loads, json.loads) for tail in tails]
+        for n, (loads, tail) in enumerate(cases):
+            with self.subTest(loads=loads, tail=tail), mock.patch.object(todo, '_loads', loads):
+                self.data_file = os.path.join(self.dir, f'tasks{n}.json')
+                app = self.open_app()
+                self.add(app, 'one')
+                self.close_without_compacting(app)
+                # Anything after the bad record is dropped too
+                with open(app.journal_file, 'ab') as f:
+                    f.write(tail + b'{"op": "del", "id": "%s"}\n' % app.tasks[0].id.encode())
+
+                app = self.open_app()
+                self.assertEqual(self.descriptions(app), ['one'])
+                self.add(app, 'two')
+                self.close_without_compacting(app)
+                self.assertEqual(self.descriptions(self.open_app()), ['one', 'two'])
+
+    def test_compact_folds_journal_into_snapshot(self):
+        app = self.open_app()
+        self.add(app, 'one', 'two')
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.toggle_complete(app.tasks[0].id)
+        app.compact()
+        self.assertFalse(os.path.exists(app.journal_file))
+        self.assertTrue(os.path.exists(self.data_file))
+
+        app = self.open_app()
+        self.assertEqual(self.descriptions(app), ['one', 'two'])
+        self.assertEqual([t.completed for t in app.tasks], [True, False])
+
+    def test_compact_after_torn_replay(self):
+        app = self.open_app()
+        self.add(app, 'one')
+        self.close_without_compacting(app)
+        with open(app.journal_file, 'ab') as f:
+            f.write(b'{"op": "del", "id"')
+
+        app = self.open_app()
+        app.compact()
+        self.assertFalse(os.path.exists(app.journal_file))
+        self.assertEqual(self.descriptions(self.open_app()), ['one'])
+
+    def test_corrupt_snapshot_is_set_aside(self):
+        app = self.open_app()
+        self.add(app, 'from journal')
+        self.close_without_compacting(app)
+        snapshot = b'[{"id": "aaaa1111bbbb", "description": "keep me"},'
+        with open(self.data_file, 'wb') as f:
+            f.write(snapshot)
+
+        app = self.open_app()
+        self.assertEqual(self.descriptions(app), ['from journal'])
+        app.compact()  # What the atexit hook runs
+
+        with open(self.data_file + '.corrupt', 'rb') as f:
+            self.assertEqual(f.read(), snapshot)
+        self.assertEqual(self.descriptions(self.open_app()), ['from journal'])
+
+
+if __name__ == '__main__':
+    unittest.main()
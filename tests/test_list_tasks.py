@@ -0,0 +1,58 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.output import create_output
+
+from todo_app.todo import TodoApp
+
+
+class ListTasksTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.dir, 'tasks.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def list_output(self, snapshot, **kwargs):
+        with open(self.data_file, 'w') as f:
+            f.write(snapshot)
+        out = io.StringIO()
+        # The table goes through prompt_toolkit, which keeps its own output
+        with contextlib.redirect_stdout(out), create_app_session(output=create_output(stdout=out)):
+            TodoApp(self.data_file).list_tasks(**kwargs)
+        return out.getvalue()
+
+    def test_lists_task_without_description(self):
+        out = self.list_output('[{"id": "abcdef0123456789", "priority": "high"}]')
+        self.assertIn('abcdef01', out)
+        self.assertIn('None', out)
+        self.assertIn('Total tasks shown: 1', out)
+
+    def test_filters_and_sorts(self):
+        out = self.list_output(
+            '[{"id": "aaaa1111", "description": "low one", "priority": "low"},'
+            ' {"id": "bbbb2222", "description": "high one", "priority": "high"},'
+            ' {"id": "cccc3333", "description": "done one", "completed": true}]',
+            filter_by='pending')
+        self.assertLess(out.index('high one'), out.index('low one'))
+        self.assertNotIn('done one', out)
+        self.assertIn('Total tasks shown: 2', out)
+
+    def test_priority_filter(self):
+        out = self.list_output(
+            '[{"id": "aaaa1111", "description": "low one", "priority": "low"},'
+            ' {"id": "bbbb2222", "description": "high one", "priority": "high"}]',
+            filter_by='priority:high')
+        self.assertNotIn('Invalid', out)
+        self.assertNotIn('low one', out)
+        self.assertIn('Total tasks shown: 1', out)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
 DATA_FILE = "~/todo_tasks.json"
 HISTORY_FILE = "~/.todo_app_history"
+JOURNAL_SUFFIX = ".log"
+# An unreadable data file is renamed to this so it is never overwritten
+CORRUPT_SUFFIX = ".corrupt"
+# Journal may grow to twice the snapshot (or this floor) before compaction
+JOURNAL_COMPACT_MIN_SIZE = 64 * 1024
 
 DATETIME_FORMAT = "%Y-%m-%d %I:%M%p"
 DATE_FORMAT = "%Y-%m-%d"
+# Sorts after any stored ISO due date; used for tasks without one
+MAX_DUE_DATE = "9999-12-31T23:59:59"
 
 COMMANDS = ['add', 'list', 'done', 'undone',
             'toggle', 'edit', 'del', 'help', 'clear', 'exit']
@@ -10,3 +17,9 @@ LIST_FILTERS = ['all', 'pending', 'completed', 'priority:high',
                 'priority:medium', 'priority:low', 'priority:none', 'due_today', 'overdue']
 LIST_SORTS = ['priority', 'due_date', 'description']
 EDIT_ADD_KEYWORDS = ['priority=', 'due=', 'desc=']
+
+# Sorted copies for prefix lookups (bisect to the first match, then walk)
+SORTED_COMMANDS = tuple(sorted(COMMANDS))
+SORTED_LIST_FILTERS = tuple(sorted(LIST_FILTERS))
+SORTED_LIST_SORTS = tuple(sorted(LIST_SORTS))
+SORTED_EDIT_ADD_KEYWORDS = tuple(sorted(EDIT_ADD_KEYWORDS))
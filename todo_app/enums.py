@@ -13,16 +13,17 @@ class Priority(IntEnum):
             # Handle case where value is None or not a string
             return cls.NONE
 
-        try:
-            # Convert to uppercase to match enum names
-            return cls[value.upper()]
-        except KeyError:
-            # If the string doesn't match any enum name, return NONE
-            return cls.NONE
+        # Table lookup; unknown names fall back to NONE without raising
+        return _NAME_TO_PRIORITY.get(value.lower(), cls.NONE)
 
     def __str__(self):
         # Return the name of the enum in lowercase for display
-        return self.name.lower()
+        return _PRIORITY_NAMES[self]
+
 
+# Lookup tables built once at import; values are contiguous from 0
+_NAME_TO_PRIORITY = {p.name.lower(): p for p in Priority}
+_PRIORITY_NAMES = tuple(p.name.lower() for p in Priority)
 
 PRIORITY_VALUES = [str(p) for p in Priority]
+SORTED_PRIORITY_VALUES = tuple(sorted(PRIORITY_VALUES))
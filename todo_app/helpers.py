@@ -1,4 +1,7 @@
 import datetime
+import functools
+import re
+import shlex
 
 from todo_app.constants import DATE_FORMAT, DATETIME_FORMAT
 
@@ -28,15 +31,22 @@ def format_due_date_display(iso_date_str: str):
 # --- Helper Function for Sorting/Filtering Key ---
 
 
+@functools.lru_cache(maxsize=None)
 def get_datetime_from_iso(iso_date_str: str):
     """
     Parses an ISO datetime string for comparison.
     Returns a datetime object, or datetime.max if None/invalid.
+    Results are cached per string for the session; the cache is unbounded
+    since it only ever holds the due dates the user has set.
     """
     if not iso_date_str:
         return datetime.datetime.max  # Sort tasks without dates last
     try:
-        return datetime.datetime.fromisoformat(iso_date_str)
+        dt_obj = datetime.datetime.fromisoformat(iso_date_str)
+        if dt_obj.tzinfo is not None:
+            # Stored with an offset; compare as naive local time like the rest
+            dt_obj = dt_obj.astimezone().replace(tzinfo=None)
+        return dt_obj
     except (ValueError, TypeError):
         # Try parsing as just a date if ISO fails (backward compatibility?)
         try:
@@ -57,7 +67,17 @@ def parse_datetime_flexible(date_str: str):
     if not date_str:
         return None
     try:
-        # Try datetime format first
+        # ISO-8601 input (YYYY-MM-DD[ HH:MM:SS]) is parsed in C, no format string
+        dt_obj = datetime.datetime.fromisoformat(date_str)
+    except ValueError:
+        pass
+    else:
+        # A UTC offset (+05:00, Z) would give an aware datetime that can't be
+        # compared with the naive ones used everywhere else; reject it
+        if dt_obj.tzinfo is None:
+            return dt_obj
+    try:
+        # Fall back to the user-facing datetime format (e.g. 09:00AM)
         return datetime.datetime.strptime(date_str, DATETIME_FORMAT)
     except ValueError:
         try:
@@ -68,3 +88,36 @@ def parse_datetime_flexible(date_str: str):
             return dt_obj
         except ValueError:
             return None  # Could not parse in known formats
+
+
+# --- Helper Function for Command Line Splitting ---
+
+# A token is a run of plain characters and complete '...' / "..." sections,
+# so key="two words" stays one argument like it does with shlex
+_ARG_RE = re.compile(r"""(?:[^ \t\r\n"'\\]+|"[^"\\]*"|'[^']*')+""")
+_QUOTED_RE = re.compile(r""""([^"]*)"|'([^']*)'""")
+# shlex only splits on these; \s and str.split() would also split on
+# characters such as a no-break space inside a description
+_SPLIT_RE = re.compile(r'[ \t\r\n]+')
+# Without any of these a command line is just whitespace-separated words
+_QUOTE_CHARS = frozenset('"\'\\')
+
+
+def _unquote(match):
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def split_args(input_str: str):
+    """
+    Splits a command line into arguments, matching shlex.split for the
+    inputs the app uses. Backslashes and unbalanced quotes are handed to
+    shlex itself, so malformed input still raises ValueError.
+    """
+    if _QUOTE_CHARS.isdisjoint(input_str):
+        return [part for part in _SPLIT_RE.split(input_str) if part]
+    parts = _ARG_RE.findall(input_str)
+    if _SPLIT_RE.sub('', _ARG_RE.sub('', input_str)):
+        # Something the regex can't tokenize (escape or stray quote)
+        return shlex.split(input_str)
+    return [_QUOTED_RE.sub(_unquote, p) if ('"' in p or "'" in p) else p
+            for p in parts]
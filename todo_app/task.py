@@ -1,24 +1,84 @@
 import datetime
-import uuid
+import os
 
+from todo_app.constants import MAX_DUE_DATE
 from todo_app.enums import Priority
+from todo_app.helpers import get_datetime_from_iso
 
 
 class Task:
+    # No per-instance __dict__: smaller tasks and direct slot reads in sort keys
+    __slots__ = (
+        'id', 'short_id', '_description', '_priority', '_due_date', '_due_dt',
+        'desc_key', 'description_snippet', 'priority_display',
+        'sort_key_priority', 'sort_key_due_date', 'completed', 'created_at',
+    )
+
     def __init__(self, id, description, completed=False, priority=Priority.NONE, due_date=None, created_at=None):
         self.id = id
-        self.description = description
+        self.short_id = id[:8]
+        self._description = description
+        self._priority = priority
+        self._due_date = due_date
+        self._refresh_derived()
         self.completed = completed
-        self.priority = priority
-        self.due_date = due_date
         self.created_at = created_at or datetime.datetime.now().isoformat()
 
+    # Derived fields are recomputed on assignment so list_tasks reads them
+    # as plain attributes instead of rebuilding strings/tuples per sort/row
+
+    def _refresh_derived(self):
+        description = self._description or ''
+        self.desc_key = description.casefold()
+        # Shown next to the short id in completions
+        self.description_snippet = description[:40] + ('...' if len(description) > 40 else '')
+        self.priority_display = str(self._priority).capitalize()
+        self._due_dt = None  # Parsed on first access to due_dt
+        # ISO strings sort chronologically; undated tasks go last
+        due_key = self._due_date or MAX_DUE_DATE
+        self.sort_key_priority = (-self._priority, due_key, self.desc_key)
+        self.sort_key_due_date = (due_key, -self._priority, self.desc_key)
+
+    @property
+    def description(self):
+        return self._description
+
+    @description.setter
+    def description(self, value):
+        self._description = value
+        self._refresh_derived()
+
+    @property
+    def due_date(self):
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        self._due_date = value
+        self._refresh_derived()
+
+    @property
+    def due_dt(self):
+        """Parsed due date, or datetime.max if unset/invalid. Cached until due_date changes."""
+        if self._due_dt is None:
+            self._due_dt = get_datetime_from_iso(self._due_date)
+        return self._due_dt
+
+    @property
+    def priority(self):
+        return self._priority
+
+    @priority.setter
+    def priority(self, value):
+        self._priority = value
+        self._refresh_derived()
+
     @classmethod
     def from_dict(cls, data):
         priority_str = data.get('priority', 'none')
         priority_enum = Priority.from_string(priority_str)
         return cls(
-            id=data.get('id', str(uuid.uuid4())),
+            id=data.get('id') or os.urandom(16).hex(),
             description=data.get('description'),
             completed=data.get('completed', False),
             priority=priority_enum,
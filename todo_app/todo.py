@@ -1,73 +1,329 @@
+import atexit
+import bisect
 import json
 import os
 import datetime
-import uuid
-import shlex
-import traceback
+import weakref
+from operator import attrgetter
 
 from prompt_toolkit import PromptSession
 from prompt_toolkit.history import FileHistory
-from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit.formatted_text import HTML, FormattedText
 from prompt_toolkit.shortcuts import print_formatted_text as print_ft
+from prompt_toolkit.styles import Style
 
-from todo_app.constants import DATA_FILE, HISTORY_FILE
+from todo_app.constants import CORRUPT_SUFFIX, DATA_FILE, HISTORY_FILE, JOURNAL_COMPACT_MIN_SIZE, JOURNAL_SUFFIX, LIST_SORTS
 from todo_app.enums import Priority
 from todo_app.task import Task
 from todo_app.helpers import (
     format_due_date_display,
-    get_datetime_from_iso,
-    parse_datetime_flexible
+    parse_datetime_flexible,
+    split_args
 )
 from todo_app.todo_completer import TodoCompleter
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib codec
+    orjson = None
+
+# JSON codec for the data file and journal; both work in bytes
+if orjson is not None:
+    def _dumps(obj, pretty=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    _loads = orjson.loads
+else:
+    _PRETTY_ENCODER = json.JSONEncoder(indent=2)
+
+    def _dumps(obj, pretty=False):
+        if pretty:
+            # Encode the snapshot chunk by chunk so it never exists as both a
+            # full str and its bytes; indented output uses the Python encoder
+            # either way, so iterencode costs nothing extra
+            buf = bytearray()
+            for chunk in _PRETTY_ENCODER.iterencode(obj):
+                buf += chunk.encode('utf-8')
+            return buf
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    _loads = json.loads
+
+# Style classes for the task table printed by list_tasks
+LIST_STYLE = Style.from_dict({
+    'title': 'ansiyellow bold underline',
+    'label': 'ansicyan',
+    'rule': 'ansigray',
+    'id': 'ansiyellow',
+    'done': 'ansigreen',
+    'pending': 'ansired',
+    'priority': 'ansimagenta',
+    'due': 'ansiblue',
+    'total': 'ansiblue',
+})
+
+
+# --- list_tasks filter predicates ---
+# Each factory is called once per list_tasks call, so the date filters read
+# the clock once rather than per task
+
+
+def _filter_pending():
+    return lambda t: not t.completed
+
+
+def _filter_completed():
+    return lambda t: t.completed
+
+
+def _filter_due_today():
+    # Due dates are ISO, so compare the date prefix
+    today_iso = datetime.date.today().isoformat()
+    return lambda t: not t.completed and t.due_date and t.due_date[:10] == today_iso
+
+
+def _filter_overdue():
+    now = datetime.datetime.now()
+    return lambda t: not t.completed and t.due_date and t.due_dt < now
+
+
+def _filter_priority(priority):
+    def make_predicate():
+        return lambda t: t.priority == priority
+    return make_predicate
+
+
+# Filter token -> predicate factory; 'all' has no entry and means no filtering
+_FILTER_PREDICATES = {
+    'pending': _filter_pending,
+    'completed': _filter_completed,
+    'due_today': _filter_due_today,
+    'overdue': _filter_overdue,
+    **{"priority:" + str(p): _filter_priority(p) for p in Priority},
+}
+
+# Prebuilt, padded status cells for the task table, keyed by completed
+_STATUS_FRAGMENTS = {
+    True: ('class:done', '[X]'.ljust(10)),
+    False: ('class:pending', '[ ]'.ljust(10)),
+}
+
+# Precomputed Task sort-key attribute per sort mode
+_SORT_KEYS = {
+    'priority': attrgetter('sort_key_priority'),
+    'due_date': attrgetter('sort_key_due_date'),
+    'description': attrgetter('desc_key'),
+}
+
+
+def _is_journal_entry(entry):
+    """True if entry has the shape _append_journal writes."""
+    if not isinstance(entry, dict):
+        return False
+    op = entry.get('op')
+    if op == 'del':
+        return isinstance(entry.get('id'), str)
+    task = entry.get('task')
+    return op in ('add', 'put') and isinstance(task, dict) and isinstance(task.get('id'), str)
+
 
 class TodoApp:
     def __init__(self, data_file=DATA_FILE):
         self.data_file = os.path.expanduser(data_file)
-        self.tasks = self._load_tasks()
+        self.journal_file = self.data_file + JOURNAL_SUFFIX
+        self._journal = None
+        self._snapshot_size = 0
+        self._dirty = False  # Journal holds changes not yet in the snapshot
+        self._can_compact = True  # False while an unreadable data file is in place
+        self.tasks_version = 0  # Bumped on every change to the tasks
+        self._completer_ref = None
+        self._load_tasks()
+
+    @property
+    def completer(self):
+        """Optional TodoCompleter told about every change to the tasks."""
+        return self._completer_ref() if self._completer_ref is not None else None
+
+    @completer.setter
+    def completer(self, value):
+        # Weak, so the app doesn't keep a discarded completer alive
+        self._completer_ref = weakref.ref(value) if value is not None else None
+
+    def _index_add(self, task):
+        self._by_id[task.id] = task
+        bisect.insort(self._sorted_ids, task.id)
+
+    def _index_remove(self, task):
+        del self._by_id[task.id]
+        del self._sorted_ids[bisect.bisect_left(self._sorted_ids, task.id)]
 
     def _load_tasks(self):
-        """Loads tasks from the JSON data file."""
-        if not os.path.exists(self.data_file):
-            return []
+        """
+        Loads tasks from the JSON data file, then replays the journal.
+        The id index is filled in the same pass that builds the Tasks.
+        """
+        by_id = {}
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, 'rb') as f:
+                    buf = f.read()
+                self._snapshot_size = len(buf)
+                for d in _loads(buf):
+                    task = Task.from_dict(d)
+                    by_id[task.id] = task
+            except (ValueError, IOError) as e:
+                print(f"Error loading tasks: {e}. Starting with an empty list.")
+                by_id = {}
+                self._set_aside_data_file()
+        self._replay_journal(by_id)
+        self.tasks = list(by_id.values())
+        self._by_id = by_id
+        self._sorted_ids = sorted(by_id)
+
+    def _set_aside_data_file(self):
+        """
+        Renames an unreadable data file to <data_file>.corrupt, so the next
+        compact() writes a fresh snapshot instead of overwriting it.
+        """
+        corrupt_file = self.data_file + CORRUPT_SUFFIX
         try:
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-                return [Task.from_dict(d) for d in data]
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading tasks: {e}. Starting with an empty list.")
-            return []
+            os.replace(self.data_file, corrupt_file)
+        except OSError as e:
+            print(f"Error setting aside the data file: {e}. Changes stay in the journal.")
+            self._can_compact = False
+            return
+        self._snapshot_size = 0
+        print(f"The unreadable data file was kept as {corrupt_file}.")
+
+    def _replay_journal(self, by_id):
+        """Applies journaled mutations recorded since the last snapshot to by_id."""
+        if not os.path.exists(self.journal_file):
+            return
+        self._dirty = True  # Leftover journal; fold it in at the next compact
+        try:
+            # One read for the whole journal, then split in memory
+            with open(self.journal_file, 'rb') as f:
+                buf = f.read()
+        except IOError as e:
+            print(f"Error reading task journal: {e}")
+            return
+        good_end = 0  # Byte offset just past the last record that applied
+        start = 0
+        while start < len(buf):
+            newline = buf.find(b'\n', start)
+            end = len(buf) if newline == -1 else newline + 1
+            line = buf[start:end]
+            start = end
+            if line.strip():
+                try:
+                    entry = _loads(line)
+                except ValueError:
+                    # Torn write, possibly mid UTF-8 sequence; nothing after
+                    # it can be trusted
+                    break
+                if not _is_journal_entry(entry):
+                    break  # Not a record _append_journal wrote; same as torn
+                if entry['op'] == 'del':
+                    by_id.pop(entry['id'], None)
+                else:
+                    # 'add' and 'put' both upsert; dict keeps task order
+                    task = Task.from_dict(entry['task'])
+                    by_id[task.id] = task
+            good_end = end
+        if good_end < len(buf) or (buf and not buf.endswith(b'\n')):
+            self._trim_journal(good_end, buf[:good_end].endswith(b'\n'))
+
+    def _trim_journal(self, good_end, terminated):
+        """
+        Cuts a torn record off the journal and ends it on a newline, so the
+        next append starts a fresh line instead of extending the bad one.
+        """
+        try:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(good_end)
+                if good_end and not terminated:
+                    f.seek(good_end)
+                    f.write(b'\n')
+        except IOError as e:
+            print(f"Error repairing task journal: {e}")
 
     def _save_tasks(self):
         """Saves the current list of tasks to the JSON data file."""
+        buf = _dumps([t.to_dict() for t in self.tasks], pretty=True)
+        # Write beside the data file and swap it in, so a crash mid-write
+        # never leaves a truncated snapshot
+        tmp_file = self.data_file + '.tmp'
         try:
-            with open(self.data_file, 'w') as f:
-                json.dump([t.to_dict() for t in self.tasks], f, indent=4)
+            with open(tmp_file, 'wb') as f:
+                f.write(buf)
+            os.replace(tmp_file, self.data_file)
         except IOError as e:
             print(f"Error saving tasks: {e}")
+            return False
+        self._snapshot_size = len(buf)
+        return True
+
+    def _append_journal(self, entry):
+        """Records a single mutation as one JSON line in the journal."""
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'ab')
+            self._journal.write(_dumps(entry) + b'\n')
+            self._journal.flush()
+        except IOError as e:
+            print(f"Error saving tasks: {e}")
+            return
+        self._dirty = True
+        if self._journal.tell() > 2 * max(self._snapshot_size, JOURNAL_COMPACT_MIN_SIZE):
+            self.compact()
+
+    def compact(self):
+        """Rewrites the snapshot and truncates the journal, if anything changed."""
+        if not self._dirty or not self._can_compact or not self._save_tasks():
+            return
+        self._dirty = False
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        # Replaying a stale journal over the new snapshot is harmless, so a
+        # crash between the two steps loses nothing.
+        try:
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+        except OSError as e:
+            print(f"Error truncating task journal: {e}")
 
     def _find_task_by_id(self, identifier):
         """Finds a task by its unique ID."""
         # Try finding by full ID
-        for task in self.tasks:
-            if task.id == identifier:
-                return task
-
-        # Try finding by partial ID (e.g., first few chars)
-        possible_matches = [
-            task for task in self.tasks if task.id.startswith(identifier)]
+        task = self._by_id.get(identifier)
+        if task is not None:
+            return task
+
+        # Try finding by partial ID (e.g., first few chars); in the sorted id
+        # list all matches form one contiguous run starting at the bisect point
+        ids = self._sorted_ids
+        i = bisect.bisect_left(ids, identifier)
+        possible_matches = []
+        while i < len(ids) and ids[i].startswith(identifier):
+            possible_matches.append(self._by_id[ids[i]])
+            i += 1
         if len(possible_matches) == 1:
             return possible_matches[0]
         elif len(possible_matches) > 1:
             print(
                 f"Ambiguous identifier '{identifier}'. Multiple tasks match:")
             for t in possible_matches:
-                print(f"  - {t.id[:8]}... ({t.description})")
+                print(f"  - {t.short_id}... ({t.description})")
             return None  # Indicate ambiguity
 
         print(f"Error: Task with identifier '{identifier}' not found.")
         return None
 
+    def _resolve_task(self, task_or_id):
+        """Returns the Task itself, or looks it up when given an identifier."""
+        if isinstance(task_or_id, Task):
+            return task_or_id
+        return self._find_task_by_id(task_or_id)
+
     def add_task(self, description, priority="none", due_date_str=None):
         """Adds a new task. Parses date/time."""
         if not description:
@@ -90,94 +346,57 @@ class TodoApp:
             due_date_iso = parsed_due_datetime.isoformat()
 
         task = Task(
-            id=str(uuid.uuid4()),
+            id=os.urandom(16).hex(),
             description=description,
             completed=False,
             priority=priority_enum,
-            due_date=due_date_iso,
-            created_at=datetime.datetime.now().isoformat()
+            due_date=due_date_iso
         )
         self.tasks.append(task)
-        self._save_tasks()
-        print(f"Task added: '{description}' (ID: {task.id[:8]}...)")
+        self._index_add(task)
+        self.tasks_version += 1
+        completer = self.completer
+        if completer is not None:
+            completer.on_task_added(task)
+        self._append_journal({'op': 'add', 'task': task.to_dict()})
+        print(f"Task added: '{description}' (ID: {task.short_id}...)")
 
     def list_tasks(self, filter_by="all", sort_by="priority", reverse=False):
         """Lists tasks, with optional filtering and sorting."""
         filtered_tasks = self.tasks
-        now = datetime.datetime.now()  # Get current time for filtering
 
         # --- Filtering ---
         original_filter = filter_by
         filter_by = filter_by.lower()
 
-        if filter_by == "pending":
-            filtered_tasks = [t for t in self.tasks if not t.completed]
-        elif filter_by == "completed":
-            filtered_tasks = [t for t in self.tasks if t.completed]
-        elif filter_by.startswith("priority:"):
-            priority_str = filter_by.split(":", 1)[1].lower()
-            priority_enum = Priority.from_string(priority_str)
-            if str(priority_enum) == priority_str:
-                filtered_tasks = [
-                    t for t in self.tasks if t.priority == priority_enum]
+        # Resolve the filter to one predicate with a single table lookup,
+        # then walk the tasks once. 'all' (the default) keeps self.tasks as
+        # is; sorted() copies it anyway.
+        predicate = None
+        if filter_by != "all":
+            make_predicate = _FILTER_PREDICATES.get(filter_by)
+            if make_predicate is not None:
+                predicate = make_predicate()
+            elif filter_by.startswith("priority:"):
+                print(
+                    f"Invalid priority filter: {filter_by.split(':', 1)[1]}. Showing all.")
+                original_filter = "all"
             else:
-                print(f"Invalid priority filter: {priority_str}. Showing all.")
+                print(f"Invalid filter: {original_filter}. Showing all tasks.")
                 original_filter = "all"
-                filtered_tasks = self.tasks
-        elif filter_by == "due_today":
-            today = now.date()
-            filtered_tasks = [
-                t for t in self.tasks
-                if not t.completed and t.due_date and get_datetime_from_iso(t.due_date).date() == today
-            ]
-        elif filter_by == "overdue":
-            filtered_tasks = [
-                t for t in self.tasks if not t.completed and t.due_date and get_datetime_from_iso(t.due_date) < now
-            ]
-        elif filter_by != "all":
-            print(f"Invalid filter: {original_filter}. Showing all tasks.")
-            original_filter = "all"
-            filtered_tasks = self.tasks
+
+        if predicate is not None:
+            filtered_tasks = [t for t in self.tasks if predicate(t)]
 
         # --- Sorting ---
         sort_by = sort_by.lower()
 
-        if sort_by == "priority":
-            def key_func(t):
-                return (
-                    -t.priority,
-                    get_datetime_from_iso(t.due_date),
-                    t.description.lower()
-                )
-        elif sort_by == "due_date":
-            def key_func(t):
-
-                return (
-                    get_datetime_from_iso(t.due_date),
-                    -t.priority,
-                    t.description.lower()
-                )
-        elif sort_by == "description":
-            def key_func(t):
-                return t.description.lower()
-        else:
+        if sort_by not in LIST_SORTS:
             print(f"Invalid sort key: {sort_by}. Using default (priority).")
             sort_by = "priority"
 
-            # Assign default key func again
-            def key_func(t):
-                return (
-                    -t.priority,
-                    get_datetime_from_iso(t.due_date),
-                    t.description.lower()
-                )
-
-        try:
-            sorted_tasks = sorted(filtered_tasks, key=key_func)
-        except Exception as e:
-            print(f"Error during sorting: {e}")
-            traceback.print_exc()  # Print full error
-            sorted_tasks = filtered_tasks
+        # Sort keys are precomputed on each Task, so the key is a C attrgetter
+        sorted_tasks = sorted(filtered_tasks, key=_SORT_KEYS[sort_by])
 
         # --- Display ---
         if not sorted_tasks:
@@ -187,86 +406,94 @@ class TodoApp:
         if reverse:
             sorted_tasks.reverse()
 
-        # Colorized header block
-        print_ft(HTML(
-            '\n<u><b><ansiyellow>--- Your Tasks ---</ansiyellow></b></u>'
-        ))
-        print_ft(HTML(
-            f"<ansicyan>Filter:</ansicyan> {original_filter} "
-            "<ansigray>|</ansigray> "
-            "<ansicyan>Sort:</ansicyan> {sort_by}"
-        ))
-        print_ft(HTML(f"<ansigray>{'-' * 80}</ansigray>"))
-        header = HTML(
-            '<b>'
-            f'<ansiyellow>{"ID":<10}</ansiyellow>'
-            f'<ansigreen>{"Status":<10}</ansigreen>'
-            f'<ansimagenta>{"Priority":<12}</ansimagenta>'
-            f'<ansiblue>{"Due Date/Time":<20}</ansiblue>'
-            f'Description'
-            '</b>'
-        )
-        print_ft(header)
-        print_ft(HTML(f"<ansigray>{'-' * 80}</ansigray>"))
+        rule = ('class:rule', f"{'-' * 80}\n")
+        fragments = [
+            ('class:title', '\n--- Your Tasks ---'),
+            ('', '\n'),
+            ('class:label', 'Filter:'),
+            ('', f' {original_filter} '),
+            ('class:rule', '|'),
+            ('', ' '),
+            ('class:label', 'Sort:'),
+            ('', f' {sort_by}\n'),
+            rule,
+            ('class:id bold', f'{"ID":<10}'),
+            ('class:done bold', f'{"Status":<10}'),
+            ('class:priority bold', f'{"Priority":<12}'),
+            ('class:due bold', f'{"Due Date/Time":<20}'),
+            ('bold', 'Description\n'),
+            rule,
+        ]
 
         for task in sorted_tasks:
-            status = "[X]" if task.completed else "[ ]"
-            # Format and color each field
-            short_id = task.id[:8]
-            priority_display = str(task.priority).capitalize()
-            due_display = format_due_date_display(task.due_date)
-            status_color = "ansigreen" if task.completed else "ansired"
-            row = HTML(
-                f"<ansiyellow>{short_id:<10}</ansiyellow>"
-                f"<{status_color}>{status:<10}</{status_color}>"
-                f"<ansimagenta>{priority_display:<12}</ansimagenta>"
-                f"<ansiblue>{due_display:<20}</ansiblue>"
-                f"{task.description}"
-            )
-            print_ft(row)
+            # Pad each column with str.ljust; the status cell is prebuilt
+            fragments += [
+                ('class:id', task.short_id.ljust(10)),
+                _STATUS_FRAGMENTS[task.completed],
+                ('class:priority', task.priority_display.ljust(12)),
+                ('class:due', format_due_date_display(task.due_date).ljust(20)),
+                ('', f'{task.description}\n'),
+            ]
 
-        print_ft(HTML(f"<ansigray>{'-' * 80}</ansigray>"))
-        print_ft(
-            HTML(f"<ansiblue>Total tasks shown:</ansiblue> <b>{len(sorted_tasks)}</b>"))
+        fragments += [
+            rule,
+            ('class:total', 'Total tasks shown:'),
+            ('', ' '),
+            ('bold', str(len(sorted_tasks))),
+        ]
+        # One FormattedText for the whole table: no per-row HTML parsing and a
+        # single write/flush
+        print_ft(FormattedText(fragments), style=LIST_STYLE)
 
     def toggle_complete(self, identifier):
-        """Marks a task as complete or incomplete."""
-        task = self._find_task_by_id(identifier)
+        """Marks a task as complete or incomplete. Accepts an ID or a resolved Task."""
+        task = self._resolve_task(identifier)
         if task:
             task.completed = not task.completed
-            self._save_tasks()
+            self.tasks_version += 1
+            completer = self.completer
+            if completer is not None:
+                completer.on_task_edited(task)
+            self._append_journal({'op': 'put', 'task': task.to_dict()})
             status = "completed" if task.completed else "pending"
             print(f"Task '{task.description}' marked as {status}.")
 
     def delete_task(self, identifier):
-        """Deletes a task."""
-        task_to_delete = self._find_task_by_id(identifier)
+        """Deletes a task. Accepts an ID or a resolved Task; returns True if deleted."""
+        task_to_delete = self._resolve_task(identifier)
         if task_to_delete:
             desc = task_to_delete.description
             confirm = input(
-                f"Are you sure you want to delete task '{desc}' (ID: {task_to_delete.id[:8]})? (y/N): ")
+                f"Are you sure you want to delete task '{desc}' (ID: {task_to_delete.short_id})? (y/N): ")
             if confirm.lower() == 'y':
                 self.tasks.remove(task_to_delete)
-                self._save_tasks()
+                self._index_remove(task_to_delete)
+                self.tasks_version += 1
+                completer = self.completer
+                if completer is not None:
+                    completer.on_task_removed(task_to_delete)
+                self._append_journal({'op': 'del', 'id': task_to_delete.id})
                 print(f"Task '{desc}' deleted.")
+                return True
             else:
                 print("Deletion cancelled.")
+        return False
 
     def edit_task(self, identifier, new_description=None, new_priority=None, new_due_date=None):
-        """Edits properties of an existing task. Parses date/time."""
-        task = self._find_task_by_id(identifier)
+        """Edits properties of an existing task. Parses date/time. Accepts an ID or a resolved Task."""
+        task = self._resolve_task(identifier)
         if task:
             updated = False
             if new_description is not None:
                 task.description = new_description
-                print(f"Description updated for task ID {task.id[:8]}.")
+                print(f"Description updated for task ID {task.short_id}.")
                 updated = True
             if new_priority is not None:
                 priority_enum = Priority.from_string(new_priority)
                 if str(priority_enum) == new_priority.lower() or new_priority.lower() == "none":
                     task.priority = priority_enum
                     print(
-                        f"Priority updated to '{new_priority}' for task ID {task.id[:8]}.")
+                        f"Priority updated to '{new_priority}' for task ID {task.short_id}.")
                     updated = True
                 else:
                     print(
@@ -275,97 +502,84 @@ class TodoApp:
             if new_due_date is not None:
                 if new_due_date.lower() == 'none':
                     task.due_date = None
-                    print(f"Due date removed for task ID {task.id[:8]}.")
+                    print(f"Due date removed for task ID {task.short_id}.")
                     updated = True
                 else:
                     parsed_due_datetime = parse_datetime_flexible(new_due_date)
                     if parsed_due_datetime:
                         task.due_date = parsed_due_datetime.isoformat()
                         print(
-                            f"Due date updated to '{format_due_date_display(task.due_date)}' for task ID {task.id[:8]}.")
+                            f"Due date updated to '{format_due_date_display(task.due_date)}' for task ID {task.short_id}.")
                         updated = True
                     else:
                         print(
                             f"Error: Invalid date/time format '{new_due_date}'. Use YYYY-MM-DD or YYYY-MM-DD HH:MM. No change made.")
 
             if updated:
-                self._save_tasks()
+                self.tasks_version += 1
+                completer = self.completer
+                if completer is not None:
+                    completer.on_task_edited(task)
+                self._append_journal({'op': 'put', 'task': task.to_dict()})
             else:
                 print("No valid changes specified for the task.")
 
 
-def print_help():
-    """Prints the help menu with colors and formatting."""
-    print_ft(HTML(
-        '<u><b><ansiyellow>--- To-Do App Commands ---</ansiyellow></b></u>'
-    ))
+# Help menu markup, joined and parsed into one HTML object at import
+_HELP_HTML = HTML('\n'.join((
+    '<u><b><ansiyellow>--- To-Do App Commands ---</ansiyellow></b></u>',
     # -- add --
-    print_ft(HTML(
-        '  <ansicyan>add</ansicyan> '
-        '<b><i>&lt;description&gt;</i></b> '
-        '[<ansiyellow>priority=&lt;prio&gt;</ansiyellow>] '
-        '[<ansiyellow>due=&lt;date|datetime&gt;</ansiyellow>] '
-        '- Add a new task'
-    ))
-    print_ft(HTML(
-        '      <ansigreen>Priorities:</ansigreen> high, medium, low, none (default)'
-    ))
-    print_ft(HTML(
-        '      <ansigreen>Due Format:</ansigreen> \'YYYY-MM-DD\' or \'YYYY-MM-DD HH:MM AM/PM\''
-    ))
-    print_ft(HTML(
-        '      <u>Example</u>: add "Meeting Prep" priority=high due="2024-05-20 09:00AM"'
-    ))
+    '  <ansicyan>add</ansicyan> '
+    '<b><i>&lt;description&gt;</i></b> '
+    '[<ansiyellow>priority=&lt;prio&gt;</ansiyellow>] '
+    '[<ansiyellow>due=&lt;date|datetime&gt;</ansiyellow>] '
+    '- Add a new task',
+    '      <ansigreen>Priorities:</ansigreen> high, medium, low, none (default)',
+    '      <ansigreen>Due Format:</ansigreen> \'YYYY-MM-DD\' or \'YYYY-MM-DD HH:MM AM/PM\'',
+    '      <u>Example</u>: add "Meeting Prep" priority=high due="2024-05-20 09:00AM"',
     # -- list --
-    print_ft(HTML(
-        '  <ansicyan>list</ansicyan> [<b>filter</b>] [<ansiyellow>sort=&lt;key&gt;</ansiyellow>] '
-        '- List tasks'
-    ))
-    print_ft(HTML('      <ansigreen>Filters:</ansigreen> all (default), pending, completed, '
-                  'priority:&lt;prio&gt;, due_today, overdue'))
-    print_ft(HTML(
-        '      <ansigreen>Sort Keys:</ansigreen> priority (default), due_date, description'))
-    print_ft(HTML('      <u>Example</u>: list pending sort=due_date'))
+    '  <ansicyan>list</ansicyan> [<b>filter</b>] [<ansiyellow>sort=&lt;key&gt;</ansiyellow>] '
+    '- List tasks',
+    '      <ansigreen>Filters:</ansigreen> all (default), pending, completed, '
+    'priority:&lt;prio&gt;, due_today, overdue',
+    '      <ansigreen>Sort Keys:</ansigreen> priority (default), due_date, description',
+    '      <u>Example</u>: list pending sort=due_date',
     # -- done --
-    print_ft(HTML(
-        '  <ansicyan>done</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Mark task as completed'))
-    print_ft(HTML(
-        '      <u>Example</u>: done 12345678'))
+    '  <ansicyan>done</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Mark task as completed',
+    '      <u>Example</u>: done 12345678',
     # -- undone --
-    print_ft(HTML(
-        '  <ansicyan>undone</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Mark task as pending'))
+    '  <ansicyan>undone</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Mark task as pending',
     # -- toggle --
-    print_ft(HTML(
-        '  <ansicyan>toggle</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Toggle task status'))
+    '  <ansicyan>toggle</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Toggle task status',
     # -- edit --
-    print_ft(HTML('  <ansicyan>edit</ansicyan> <b><i>&lt;task_id&gt;</i></b> '
-                  '[<ansiyellow>desc="&lt;new_desc&gt;"</ansiyellow>] '
-                  '[<ansiyellow>priority=&lt;prio&gt;</ansiyellow>] '
-                  '[<ansiyellow>due=&lt;date|datetime|none&gt;</ansiyellow>] '
-                  '- Edit task'))
-    print_ft(
-        HTML('      <u>Example</u>: edit 12345678 priority=medium due="2024-06-01"'))
+    '  <ansicyan>edit</ansicyan> <b><i>&lt;task_id&gt;</i></b> '
+    '[<ansiyellow>desc="&lt;new_desc&gt;"</ansiyellow>] '
+    '[<ansiyellow>priority=&lt;prio&gt;</ansiyellow>] '
+    '[<ansiyellow>due=&lt;date|datetime|none&gt;</ansiyellow>] '
+    '- Edit task',
+    '      <u>Example</u>: edit 12345678 priority=medium due="2024-06-01"',
     # -- delete --
-    print_ft(
-        HTML('  <ansicyan>del</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Delete a task'))
+    '  <ansicyan>del</ansicyan> <b><i>&lt;task_id&gt;</i></b> - Delete a task',
     # -- help --
-    print_ft(HTML('  <ansicyan>help</ansicyan> - Show this help message'))
+    '  <ansicyan>help</ansicyan> - Show this help message',
     # -- clear --
-    print_ft(HTML('  <ansicyan>clear</ansicyan> - Clear the screen'))
+    '  <ansicyan>clear</ansicyan> - Clear the screen',
     # -- exit --
-    print_ft(HTML('  <ansicyan>exit</ansicyan> - Exit the application'))
-    print_ft(
-        HTML('<ansiblue>----------------------------------------------</ansiblue>\n'))
-    print_ft(HTML(
-        '<i>Hint:</i> Use <b><ansiblue>TAB</ansiblue></b> to autocomplete commands and arguments.'))
+    '  <ansicyan>exit</ansicyan> - Exit the application',
+    '<ansiblue>----------------------------------------------</ansiblue>\n',
+    '<i>Hint:</i> Use <b><ansiblue>TAB</ansiblue></b> to autocomplete commands and arguments.',
+)))
+
+
+def print_help():
+    """Prints the help menu with colors and formatting."""
+    print_ft(_HELP_HTML)
 
 
 def parse_args(input_str):
-    """Parses arguments using shlex for better quote handling."""
+    """Parses arguments with shlex-style quote handling."""
     try:
-        # Use posix=False on Windows if paths with backslashes are arguments,
-        # otherwise default (True) is usually fine. Keep default for now.
-        parts = shlex.split(input_str)
+        parts = split_args(input_str)
     except ValueError as e:
         print(f"Warning: Input parsing issue (maybe unmatched quotes?): {e}")
         parts = input_str.split()  # Fallback
@@ -427,6 +641,9 @@ def main():
     history = FileHistory(os.path.expanduser(HISTORY_FILE))
     session = PromptSession(history=history)
     todo_completer = TodoCompleter(app)
+    app.completer = todo_completer
+    # Fold the journal into the snapshot however the session ends
+    atexit.register(app.compact)
 
     print(app.data_file)
 
@@ -466,7 +683,6 @@ def main():
                 priority = kwargs.get('priority', 'none')
                 due_date = kwargs.get('due')  # String from input
                 app.add_task(description, priority, due_date)
-                todo_completer.update_task_ids()
             elif command == "list":
                 reverse = "reverse" in params
                 if reverse:
@@ -483,39 +699,28 @@ def main():
                     continue
                 identifier = params[0]
 
-                # Pre-find task for commands that benefit from knowing if it exists first
-                task_exists = app._find_task_by_id(identifier) if command in [
-                    "done", "undone"] else True  # Assume exists for others initially
-
-                if not task_exists and command in ["done", "undone"]:
-                    # _find already prints error, just continue
+                # Resolve once and hand the Task on; _find already prints errors
+                task = app._find_task_by_id(identifier)
+                if not task:
                     continue
 
                 if command == "done":
-                    # Find again for status check
-                    task = app._find_task_by_id(identifier)
-                    if task and not task.completed:
-                        app.toggle_complete(identifier)
-                    elif task:
+                    if task.completed:
                         print(
                             f"Task '{task.description}' is already marked as done.")
+                    else:
+                        app.toggle_complete(task)
                 elif command == "undone":
-                    task = app._find_task_by_id(identifier)
-                    if task and task.completed:
-                        app.toggle_complete(identifier)
-                    elif task:
+                    if not task.completed:
                         print(
                             f"Task '{task.description}' is already marked as pending.")
+                    else:
+                        app.toggle_complete(task)
                 elif command == "toggle":
-                    # Let toggle handle find/error
-                    app.toggle_complete(identifier)
+                    app.toggle_complete(task)
                 elif command == "del":
-                    # delete_task handles find/error/confirmation internally
-                    original_tasks_count = len(app.tasks)
-                    app.delete_task(identifier)
-                    # Check if deletion likely succeeded
-                    if len(app.tasks) < original_tasks_count:
-                        todo_completer.update_task_ids()
+                    # delete_task handles confirmation internally
+                    app.delete_task(task)
                 elif command == "edit":
                     new_desc = kwargs.get('desc')
                     new_prio = kwargs.get('priority')
@@ -525,8 +730,7 @@ def main():
                             "Error: Edit command requires at least one property to change (desc=, priority=, due=).")
                         print_help()
                         continue
-                    # edit_task handles find/error internally
-                    app.edit_task(identifier, new_description=new_desc,
+                    app.edit_task(task, new_description=new_desc,
                                   new_priority=new_prio, new_due_date=new_due)
 
             else:
@@ -540,6 +744,7 @@ def main():
             print("\nExiting.")
             break
         except Exception as e:
+            import traceback  # Only needed once something has gone wrong
             print(f"\nAn unexpected error occurred: {e}")
             traceback.print_exc()  # Print detail for debugging
 
@@ -1,153 +1,290 @@
 import datetime
-import shlex
+import re
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
 
 from prompt_toolkit.completion import Completer, Completion
 
-from todo_app.constants import COMMANDS, DATE_FORMAT, DATETIME_FORMAT, EDIT_ADD_KEYWORDS, LIST_FILTERS, LIST_SORTS
-from todo_app.enums import PRIORITY_VALUES
+from todo_app.constants import (
+    DATE_FORMAT, DATETIME_FORMAT, EDIT_ADD_KEYWORDS, LIST_FILTERS,
+    SORTED_COMMANDS, SORTED_EDIT_ADD_KEYWORDS, SORTED_LIST_FILTERS, SORTED_LIST_SORTS
+)
+from todo_app.enums import SORTED_PRIORITY_VALUES
+from todo_app.helpers import split_args
+
+# A lone first word with nothing for the tokenizer to do (no quotes/escapes)
+_PLAIN_WORD_RE = re.compile(r'[^ \t\r\n"\'\\]*\Z')
+
+
+def _prefix_matches(sorted_seq, prefix):
+    """Entries of sorted_seq starting with prefix: bisect to the first, walk while they match."""
+    i = bisect_left(sorted_seq, prefix)
+    matches = []
+    while i < len(sorted_seq) and sorted_seq[i].startswith(prefix):
+        matches.append(sorted_seq[i])
+        i += 1
+    return matches
+
+
+def _used_keywords(words):
+    """Names of the keyword=value arguments already given after the command."""
+    return {word[:word.find('=')] for word in words[1:] if '=' in word}
 
 # --- Completer Class ---
 
 
 class TodoCompleter(Completer):
+    # Lookup tables hoisted out of get_completions so keystrokes reuse them
+    _FILTERS = frozenset(LIST_FILTERS)
+    _FILTERS_NO_ALL = _FILTERS - {'all'}
+    # keyword -> its name without '=', in EDIT_ADD_KEYWORDS order
+    _KEYWORD_BASES = {keyword: keyword.split('=')[0] for keyword in EDIT_ADD_KEYWORDS}
+
+    # (monotonic second, today's date, current datetime) as formatted strings
+    _date_cache = (None, '', '')
+    _COMPLETION_CACHE_SIZE = 256
+
     def __init__(self, todo_app_instance):
         self.app = todo_app_instance
-        self.task_ids = {task.id[:8] for task in self.app.tasks}
-        self.full_task_ids = {task.id for task in self.app.tasks}
+        # context -> (prefix, matches) from the last lookup in that context
+        self._last_candidates = {}
+        # (tasks_version, text before cursor) -> completions, least recent first
+        self._completion_cache = OrderedDict()
+        self._used_clock = False  # Set when a result includes the current time
+        # (short id, full id, Task) for every task, sorted so a typed prefix
+        # is a bisect away; tasks sharing a short id sit next to each other.
+        # Built once here, then kept current by the on_task_* hooks.
+        self._id_index = sorted(
+            (task.short_id, task_id, task) for task_id, task in self.app._by_id.items())
+
+    # Hooks called by TodoApp after it changes its tasks; each updates the id
+    # index for that one task instead of rescanning the app.
+
+    def on_task_added(self, task):
+        insort(self._id_index, (task.short_id, task.id, task))
 
-    def update_task_ids(self):
-        self.task_ids = {task.id[:8] for task in self.app.tasks}
-        self.full_task_ids = {task.id for task in self.app.tasks}
+    def on_task_removed(self, task):
+        entry = (task.short_id, task.id)
+        i = bisect_left(self._id_index, entry)
+        if i < len(self._id_index) and self._id_index[i][:2] == entry:
+            del self._id_index[i]
+
+    def on_task_edited(self, task):
+        # Ids never change and the index holds the Task itself, so its new
+        # description_snippet is already what completions show; cached
+        # completions are keyed on tasks_version, which the app has bumped
+        pass
+
+    def _id_matches(self, prefix):
+        """
+        Yields (short id, Task) for each short id starting with prefix, in
+        order. The Task is None when several tasks share the short id.
+        """
+        index = self._id_index
+        i = bisect_left(index, (prefix,))
+        while i < len(index) and index[i][0].startswith(prefix):
+            short_id, _, task = index[i]
+            i += 1
+            if i < len(index) and index[i][0] == short_id:
+                task = None
+                while i < len(index) and index[i][0] == short_id:
+                    i += 1
+            yield short_id, task
+
+    def _date_strings(self):
+        """Today's date and the current datetime, formatted at most once per second."""
+        self._used_clock = True
+        second = int(time.monotonic())
+        if second != self._date_cache[0]:
+            now = datetime.datetime.now()
+            self._date_cache = (second, now.strftime(DATE_FORMAT), now.strftime(DATETIME_FORMAT))
+        return self._date_cache[1:]
+
+    def _candidates(self, context, source, prefix):
+        """
+        Returns the entries of the sorted source that start with prefix. When
+        the user has only typed further since the last call in this context,
+        the previous (still sorted) matches are narrowed instead of source.
+        """
+        last = self._last_candidates.get(context)
+        pool = last[1] if last is not None and prefix.startswith(last[0]) else source
+        matches = _prefix_matches(pool, prefix)
+        self._last_candidates[context] = (prefix, matches)
+        return matches
+
+    def _yield_prefix(self, context, source, prefix, start_position, meta=None):
+        """Yields a Completion for each entry of the sorted source starting with prefix."""
+        for text in self._candidates(context, source, prefix):
+            yield Completion(text, start_position=start_position, display_meta=meta)
 
     def get_completions(self, document, complete_event):
-        self.update_task_ids()  # Ensure task IDs are fresh
+        # Menu redraws and retyping after a backspace ask for the same text
+        # again; a new tasks_version makes older entries unreachable
+        key = (self.app.tasks_version, document.text_before_cursor)
+        completions = self._completion_cache.get(key)
+        if completions is not None:
+            self._completion_cache.move_to_end(key)
+            return completions
+
+        self._used_clock = False
+        completions = tuple(self._compute_completions(document.text_before_cursor))
+        if not self._used_clock:
+            self._completion_cache[key] = completions
+            if len(self._completion_cache) > self._COMPLETION_CACHE_SIZE:
+                self._completion_cache.popitem(last=False)
+        return completions
+
+    def _compute_completions(self, text_before_cursor):
+        # The cursor sits after a space: a new (still empty) word starts there
+        ends_with_space = text_before_cursor.endswith(' ')
+
+        # 1. Complete Command Name; the common case, so skip tokenizing
+        stripped = text_before_cursor.lstrip()
+        if not ends_with_space and _PLAIN_WORD_RE.match(stripped):
+            yield from self._yield_prefix('cmd', SORTED_COMMANDS, stripped, -len(stripped))
+            return
 
-        text_before_cursor = document.text_before_cursor
         try:
-            words = shlex.split(text_before_cursor)
-            if text_before_cursor.endswith(' '):
+            words = split_args(text_before_cursor)
+            if ends_with_space:
                 words.append('')
         except ValueError:
             words = text_before_cursor.split()
 
         word_count = len(words)
-        current_word = words[-1] if word_count > 0 and not text_before_cursor.endswith(
-            ' ') else ""
-
-        # 1. Complete Command Name
-        if word_count <= 1 and not text_before_cursor.endswith(' '):
-            for cmd in COMMANDS:
-                if cmd.startswith(current_word):
-                    yield Completion(cmd, start_position=-len(current_word))
+        current_word = words[-1] if word_count > 0 and not ends_with_space else ""
+
+        # Command name that needed tokenizing (e.g. quoted)
+        if word_count <= 1 and not ends_with_space:
+            yield from self._yield_prefix('cmd', SORTED_COMMANDS, current_word, -len(current_word))
             return
 
         command = words[0].lower() if word_count > 0 else ""
+        handler = self._HANDLERS.get(command)
+        if handler is not None:
+            yield from handler(self, words, current_word, ends_with_space)
 
-        # 2. Complete Task IDs
-        if command in ['done', 'undone', 'toggle', 'del', 'edit'] and word_count == 2 and not text_before_cursor.endswith(' '):
-            for task_id_prefix in self.task_ids:
-                if task_id_prefix.startswith(current_word):
-                    full_id_match = [
-                        fid for fid in self.full_task_ids if fid.startswith(task_id_prefix)]
-                    meta_desc = "Task ID"
-                    if len(full_id_match) == 1:
-                        task = self.app._find_task_by_id(
-                            full_id_match[0])  # Use find method
-                        if task:
-                            meta_desc = task.description[:40] + \
-                                ('...' if len(task.description) > 40 else '')
-                    yield Completion(task_id_prefix, start_position=-len(current_word), display_meta=meta_desc)
-            return
+    # Argument completion, one generator per command; dispatched by name
+    # through _HANDLERS
+
+    def _complete_task_id(self, words, current_word, ends_with_space):
+        if len(words) == 2 and not ends_with_space:
+            # Narrow the previous matches while the user keeps typing the same
+            # id, like _candidates; the version check drops them once tasks change
+            last = self._last_candidates.get('task_id')
+            if last is not None and last[0] == self.app.tasks_version and current_word.startswith(last[1]):
+                matches = [m for m in last[2] if m[0].startswith(current_word)]
+            else:
+                matches = list(self._id_matches(current_word))
+            self._last_candidates['task_id'] = (self.app.tasks_version, current_word, matches)
+            for task_id_prefix, task in matches:
+                meta_desc = task.description_snippet if task else "Task ID"
+                yield Completion(task_id_prefix, start_position=-len(current_word), display_meta=meta_desc)
 
-        # 3. Complete Arguments for 'list'
-        if command == 'list':
-            has_sort_keyword = any(w.startswith("sort=") for w in words[:-1])
-            has_filter_keyword = any(f in words[1:-1]
-                                     for f in LIST_FILTERS if f != 'all')
-            has_reverse_keyword = any(
-                w.lower() == "reverse" for w in words[:-1])
-
-            # Suggest reverse keyword
-            if not has_reverse_keyword and text_before_cursor.endswith(' '):
-                yield Completion("reverse", start_position=-len(current_word), display_meta='Order')
-
-            # Suggest filters or 'sort=' keyword
-            if word_count == 2:
-                if current_word.startswith("sort="):
-                    typed = current_word[len("sort="):]
-                    for key in LIST_SORTS:
-                        if key.startswith(typed):
-                            yield Completion(key, start_position=0, display_meta='Sort Key')
-                else:
-                    # Suggest filter names if not used
-                    if not has_sort_keyword:
-                        for filt in LIST_FILTERS:
-                            if filt.startswith(current_word):
-                                yield Completion(filt, start_position=-len(current_word), display_meta='Filter')
-                    # Suggest sort= keyword
-                    if not has_sort_keyword and "sort=".startswith(current_word):
-                        yield Completion("sort=", start_position=-len(current_word), display_meta='Sort key')
-
-            # Suggest sort key values
-            elif word_count >= 2 and words[-1].startswith("sort="):
+    def _complete_list(self, words, current_word, ends_with_space):
+        word_count = len(words)
+        # One pass over the finished arguments (not the command or the
+        # word being typed) to see which kinds are already present
+        has_sort_keyword = has_filter_keyword = has_reverse_keyword = False
+        for w in words[1:-1]:
+            if w.startswith("sort="):
+                has_sort_keyword = True
+            elif w in self._FILTERS_NO_ALL:
+                has_filter_keyword = True
+            elif w.lower() == "reverse":
+                has_reverse_keyword = True
+
+        # Suggest reverse keyword
+        if not has_reverse_keyword and ends_with_space:
+            yield Completion("reverse", start_position=-len(current_word), display_meta='Order')
+
+        # Suggest filters or 'sort=' keyword
+        if word_count == 2:
+            if current_word.startswith("sort="):
                 typed = current_word[len("sort="):]
-                for key in LIST_SORTS:
-                    if key.startswith(typed):
-                        yield Completion(key, start_position=0, display_meta='Sort Key')
-
-            # Suggest 'sort=' keyword after a filter
-            elif word_count == 3 and text_before_cursor.endswith(' ') and not has_sort_keyword:
-                is_filter_likely = words[1] in LIST_FILTERS or words[1].startswith(
-                    "priority:")
-                if is_filter_likely:
-                    yield Completion("sort=", start_position=0, display_meta='Sort key')
-
-            # Suggest filters after 'sort=' keyword
-            elif word_count == 3 and text_before_cursor.endswith(' ') and has_sort_keyword and not has_filter_keyword:
-                for filt in LIST_FILTERS:
-                    yield Completion(filt, start_position=0, display_meta='Filter')
+                yield from self._yield_prefix('sort', SORTED_LIST_SORTS, typed, 0, 'Sort Key')
+            elif not has_sort_keyword:
+                # Suggest filter names if not used
+                yield from self._yield_prefix(
+                    'filter', SORTED_LIST_FILTERS, current_word, -len(current_word), 'Filter')
+                # Suggest sort= keyword while it is still being typed
+                partial_sort = len(current_word) <= 5 and "sort=".startswith(current_word)
+                if partial_sort:
+                    yield Completion("sort=", start_position=-len(current_word), display_meta='Sort key')
 
-            return
+        # Suggest sort key values
+        elif word_count >= 2 and words[-1].startswith("sort="):
+            typed = current_word[len("sort="):]
+            yield from self._yield_prefix('sort', SORTED_LIST_SORTS, typed, 0, 'Sort Key')
 
-        # 4. Complete Arguments for 'add' and 'edit'
-        if command in ['add', 'edit']:
-            existing_keywords = {word.split('=')[0]
-                                 for word in words[1:] if '=' in word}
-
-            # Suggest keywords
-            if text_before_cursor.endswith(' '):
-                for keyword in EDIT_ADD_KEYWORDS:
-                    kw_base = keyword.split('=')[0]
-                    # Avoid suggesting 'desc=' if it's already present for 'edit'/'add' implicitly
-                    if kw_base not in existing_keywords:
-                        yield Completion(keyword, start_position=0, display_meta='Keyword')
-
-            # Suggest keyword values
-            elif '=' in current_word:
-                keyword_part, value_part = current_word.split('=', 1)
-                if keyword_part == 'priority':
-                    for prio in PRIORITY_VALUES:
-                        if prio.startswith(value_part):
-                            yield Completion(prio, start_position=-len(value_part), display_meta='Priority')
-                elif keyword_part == 'due':
-                    if 'none'.startswith(value_part):
-                        yield Completion('none', start_position=-len(value_part), display_meta='Remove due date')
-                    # Add suggestions for today's date and current datetime
-                    today_str = datetime.date.today().strftime(DATE_FORMAT)
-                    quoted_today = f'"{today_str}"'
+        # Suggest 'sort=' keyword after a filter
+        elif word_count == 3 and ends_with_space and not has_sort_keyword:
+            is_filter_likely = words[1] in self._FILTERS or words[1].startswith(
+                "priority:")
+            if is_filter_likely:
+                yield Completion("sort=", start_position=0, display_meta='Sort key')
+
+        # Suggest filters after 'sort=' keyword
+        elif word_count == 3 and ends_with_space and has_sort_keyword and not has_filter_keyword:
+            for filt in LIST_FILTERS:
+                yield Completion(filt, start_position=0, display_meta='Filter')
+
+    def _complete_add_edit(self, words, current_word, ends_with_space):
+        eq_idx = current_word.find('=')
+
+        # Suggest keyword values; needs no knowledge of the other words
+        if eq_idx >= 0:
+            keyword_part = current_word[:eq_idx]
+            value_part = current_word[eq_idx + 1:]
+            if keyword_part == 'priority':
+                yield from self._yield_prefix(
+                    'priority', SORTED_PRIORITY_VALUES, value_part, -len(value_part), 'Priority')
+            elif keyword_part == 'due':
+                if 'none'.startswith(value_part):
+                    yield Completion('none', start_position=-len(value_part), display_meta='Remove due date')
+                # Add suggestions for today's date and current datetime;
+                # both start with the year, so skip them for anything else
+                if not value_part or value_part[0].isdigit():
+                    today_str, now_str = self._date_strings()
                     if today_str.startswith(value_part):
-                        yield Completion(quoted_today, start_position=-len(value_part), display_meta='Today\'s date')
-                    now_str = datetime.datetime.now().strftime(DATETIME_FORMAT)
-                    quoted_now = f'"{now_str}"'
+                        yield Completion(f'"{today_str}"', start_position=-len(value_part), display_meta='Today\'s date')
                     if now_str.startswith(value_part):
-                        yield Completion(quoted_now, start_position=-len(value_part), display_meta='Current datetime')
+                        yield Completion(f'"{now_str}"', start_position=-len(value_part), display_meta='Current datetime')
+            return
 
-            # Suggest keywords if typing a word
-            elif not any(current_word.startswith(kw) for kw in existing_keywords):
-                for keyword in EDIT_ADD_KEYWORDS:
-                    kw_base = keyword.split('=')[0]
-                    if kw_base not in existing_keywords and keyword.startswith(current_word):
+        # Suggest keywords
+        if ends_with_space:
+            existing_keywords = _used_keywords(words)
+            for keyword, kw_base in self._KEYWORD_BASES.items():
+                # Avoid suggesting 'desc=' if it's already present for 'edit'/'add' implicitly
+                if kw_base not in existing_keywords:
+                    yield Completion(keyword, start_position=0, display_meta='Keyword')
+
+        # Suggest keywords if typing a word; the used ones are only needed
+        # once something matches
+        else:
+            candidates = self._candidates('keyword', SORTED_EDIT_ADD_KEYWORDS, current_word)
+            if candidates:
+                existing_keywords = _used_keywords(words)
+                for keyword in candidates:
+                    if self._KEYWORD_BASES[keyword] not in existing_keywords:
                         yield Completion(keyword, start_position=-len(current_word), display_meta='Keyword')
-            return
+
+    def _complete_edit(self, words, current_word, ends_with_space):
+        # The task id comes first, then the same keywords as 'add'
+        if len(words) == 2 and not ends_with_space:
+            return self._complete_task_id(words, current_word, ends_with_space)
+        return self._complete_add_edit(words, current_word, ends_with_space)
+
+    _HANDLERS = {
+        'done': _complete_task_id,
+        'undone': _complete_task_id,
+        'toggle': _complete_task_id,
+        'del': _complete_task_id,
+        'edit': _complete_edit,
+        'list': _complete_list,
+        'add': _complete_add_edit,
+    }
 
 # --- Command Line Interface ---